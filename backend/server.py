@@ -1,17 +1,24 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Response
+from fastapi.responses import ORJSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import AsyncMongoClient, WriteConcern
+from pymongo.errors import DuplicateKeyError, PyMongoError
 import os
+import re
+import asyncio
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter
 from typing import List, Optional, Dict, Any
 import uuid
+import time
 from datetime import datetime, timezone
 import jwt
 import bcrypt
+import orjson
+from cachetools import TTLCache
 from emergentintegrations.llm.chat import LlmChat, UserMessage
 
 ROOT_DIR = Path(__file__).parent
@@ -19,11 +26,24 @@ load_dotenv(ROOT_DIR / '.env')
 
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+# PyMongo's native asyncio client; keep a few connections warm so requests skip the handshake
+client = AsyncMongoClient(
+    mongo_url,
+    tz_aware=True,
+    maxPoolSize=int(os.environ.get('MONGO_MAX_POOL_SIZE', '20')),
+    minPoolSize=int(os.environ.get('MONGO_MIN_POOL_SIZE', '5'))
+)
 db = client[os.environ['DB_NAME']]
 
+# Cart rows are cheap to recreate, so acknowledge writes from the primary alone
+# instead of waiting on the deployment's default (majority) write concern
+cart_writes = db.cart.with_options(write_concern=WriteConcern(w=1, j=False))
+
+# Set at startup once the server topology is known
+transactions_supported = False
+
 # Create the main app without a prefix
-app = FastAPI(title="OrderBuddy API", version="1.0.0")
+app = FastAPI(title="OrderBuddy API", version="1.0.0", default_response_class=ORJSONResponse)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -31,6 +51,26 @@ api_router = APIRouter(prefix="/api")
 # Security
 security = HTTPBearer()
 SECRET_KEY = os.environ.get('JWT_SECRET', 'your-secret-key-here')
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', '12'))
+
+# Queries shorter than this use a name prefix match instead of the text index
+MIN_TEXT_SEARCH_LENGTH = 3
+
+# List endpoints return at most this many documents per page, newest first;
+# id breaks ties so skip/limit pages never repeat or drop documents. The frontend
+# does not page yet, so a request without a limit gets the same 1000-document cap
+# these endpoints always had; callers that page can ask for smaller pages
+MAX_PAGE_SIZE = 1000
+DEFAULT_PAGE_SIZE = MAX_PAGE_SIZE
+PAGE_SORT = [("created_at", -1), ("id", 1)]
+
+# Short-lived caches keyed by the raw bearer token, so hot authenticated
+# endpoints skip the HMAC verify and the users lookup on repeat calls
+AUTH_CACHE_TTL = 10
+token_cache = TTLCache(maxsize=10_000, ttl=AUTH_CACHE_TTL)
+user_cache = TTLCache(maxsize=10_000, ttl=AUTH_CACHE_TTL)
+# Owners rarely add shops, so their shop IDs are cached the same way, keyed by owner ID
+shop_ids_cache = TTLCache(maxsize=10_000, ttl=AUTH_CACHE_TTL)
 
 # Tamil Nadu Districts and Taluks Data
 TAMIL_NADU_LOCATIONS = {
@@ -57,9 +97,14 @@ TAMIL_NADU_LOCATIONS = {
     }
 }
 
+# Locations never change at runtime: serialize once and keep O(1) lookup sets for validation
+LOCATIONS_JSON = orjson.dumps(TAMIL_NADU_LOCATIONS)
+VALID_DISTRICTS = frozenset(TAMIL_NADU_LOCATIONS)
+VALID_TALUKS = {district: frozenset(data["taluks"]) for district, data in TAMIL_NADU_LOCATIONS.items()}
+
 # Pydantic Models
 class UserBase(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=lambda: uuid.uuid4().hex)
     email: str
     name: str
     phone: str
@@ -85,7 +130,7 @@ class UserLogin(BaseModel):
     password: str
 
 class Shop(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=lambda: uuid.uuid4().hex)
     name: str
     description: str
     owner_id: str
@@ -109,7 +154,7 @@ class ShopCreate(BaseModel):
     closing_time: str = "21:00"
 
 class Product(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=lambda: uuid.uuid4().hex)
     name: str
     description: str
     price: float
@@ -129,7 +174,7 @@ class ProductCreate(BaseModel):
     image_url: str = ""
 
 class CartItem(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=lambda: uuid.uuid4().hex)
     customer_id: str
     product_id: str
     quantity: int
@@ -140,7 +185,7 @@ class CartItemCreate(BaseModel):
     quantity: int
 
 class Order(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=lambda: uuid.uuid4().hex)
     customer_id: str
     shop_id: str
     delivery_person_id: Optional[str] = None
@@ -163,47 +208,71 @@ class AIAssistantRequest(BaseModel):
     user_id: str
     context: str = "general"  # product_search, order_help, general
 
+# Mongo projections limited to the fields each response model needs
+SHOP_FIELDS = {"_id": 0, **{field: 1 for field in Shop.model_fields}}
+PRODUCT_FIELDS = {"_id": 0, **{field: 1 for field in Product.model_fields}}
+ORDER_FIELDS = {"_id": 0, **{field: 1 for field in Order.model_fields}}
+
+# Validate whole result lists in one pydantic-core call instead of building models one by one
+ShopList = TypeAdapter(List[Shop])
+ProductList = TypeAdapter(List[Product])
+OrderList = TypeAdapter(List[Order])
+
 # Utility functions
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+# bcrypt is deliberately slow, so run it in a worker thread to keep the event loop free
+async def hash_password(password: str) -> str:
+    hashed = await asyncio.to_thread(bcrypt.hashpw, password.encode('utf-8'), bcrypt.gensalt(BCRYPT_ROUNDS))
+    return hashed.decode('utf-8')
 
-def verify_password(password: str, hashed: str) -> bool:
-    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+async def verify_password(password: str, hashed: str) -> bool:
+    return await asyncio.to_thread(bcrypt.checkpw, password.encode('utf-8'), hashed.encode('utf-8'))
 
 def create_jwt_token(user_data: dict) -> str:
     return jwt.encode(user_data, SECRET_KEY, algorithm='HS256')
 
 def verify_jwt_token(token: str) -> dict:
+    payload = token_cache.get(token)
+    if payload is not None and payload.get("exp", float("inf")) > time.time():
+        return payload
     try:
-        return jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
+        payload = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
     except:
         raise HTTPException(status_code=401, detail="Invalid token")
+    # Only successful validations are cached
+    token_cache[token] = payload
+    return payload
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     token = credentials.credentials
     user_data = verify_jwt_token(token)
+    cached_user = user_cache.get(token)
+    if cached_user is not None:
+        return cached_user
     user = await db.users.find_one({"id": user_data["user_id"]})
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
-    return UserBase(**user)
-
-def prepare_for_mongo(data):
-    """Convert datetime objects to ISO strings for MongoDB storage"""
-    if isinstance(data, dict):
-        for key, value in data.items():
-            if isinstance(value, datetime):
-                data[key] = value.isoformat()
-            elif isinstance(value, list):
-                data[key] = [prepare_for_mongo(item) if isinstance(item, dict) else item for item in value]
-            elif isinstance(value, dict):
-                data[key] = prepare_for_mongo(value)
-    return data
+    current_user = UserBase(**user)
+    user_cache[token] = current_user
+    return current_user
+
+def page_bounds(skip: int, limit: int) -> tuple:
+    """Clamp pagination query parameters to a sane range"""
+    return max(skip, 0), max(1, min(limit, MAX_PAGE_SIZE))
+
+async def get_owned_shop_ids(owner_id: str, refresh: bool = False) -> list:
+    shop_ids = None if refresh else shop_ids_cache.get(owner_id)
+    if shop_ids is None:
+        shops = await db.shops.find({"owner_id": owner_id}, {"_id": 0, "id": 1}).to_list(None)
+        shop_ids = [shop["id"] for shop in shops]
+        shop_ids_cache[owner_id] = shop_ids
+    return shop_ids
 
 def parse_from_mongo(item):
-    """Parse datetime strings back from MongoDB"""
+    """Parse datetime strings left by documents written before dates were stored natively"""
     if isinstance(item, dict):
-        for key, value in item.items():
-            if key in ['created_at', 'delivered_at'] and isinstance(value, str):
+        for key in ('created_at', 'delivered_at'):
+            value = item.get(key)
+            if isinstance(value, str):
                 try:
                     item[key] = datetime.fromisoformat(value)
                 except:
@@ -219,20 +288,26 @@ async def register_user(user_data: UserCreate):
         raise HTTPException(status_code=400, detail="Email already registered")
     
     # Validate location data
-    if user_data.district not in TAMIL_NADU_LOCATIONS:
+    if user_data.district not in VALID_DISTRICTS:
         raise HTTPException(status_code=400, detail="Invalid district")
+    if user_data.taluk not in VALID_TALUKS[user_data.district]:
+        raise HTTPException(status_code=400, detail="Invalid taluk")
     
     # Hash password
-    hashed_password = hash_password(user_data.password)
+    hashed_password = await hash_password(user_data.password)
     
     # Create user
     user_dict = user_data.dict()
     del user_dict['password']
     user = UserBase(**user_dict)
-    user_dict = prepare_for_mongo(user.dict())
+    user_dict = user.dict()
     user_dict['password'] = hashed_password
     
-    await db.users.insert_one(user_dict)
+    try:
+        await db.users.insert_one(user_dict)
+    except DuplicateKeyError:
+        # A concurrent registration with the same email got in after the check above
+        raise HTTPException(status_code=400, detail="Email already registered")
     
     # Create JWT token
     token = create_jwt_token({"user_id": user.id, "email": user.email, "user_type": user.user_type})
@@ -247,7 +322,7 @@ async def register_user(user_data: UserCreate):
 async def login_user(login_data: UserLogin):
     # Find user
     user = await db.users.find_one({"email": login_data.email})
-    if not user or not verify_password(login_data.password, user['password']):
+    if not user or not await verify_password(login_data.password, user['password']):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     # Create JWT token
@@ -264,7 +339,7 @@ async def login_user(login_data: UserLogin):
 # Location Routes
 @api_router.get("/locations")
 async def get_locations():
-    return TAMIL_NADU_LOCATIONS
+    return Response(content=LOCATIONS_JSON, media_type="application/json")
 
 # Shop Routes
 @api_router.post("/shops", dependencies=[Depends(get_current_user)])
@@ -273,13 +348,14 @@ async def create_shop(shop_data: ShopCreate, current_user: UserBase = Depends(ge
         raise HTTPException(status_code=403, detail="Only shop owners can create shops")
     
     shop = Shop(**shop_data.dict(), owner_id=current_user.id)
-    shop_dict = prepare_for_mongo(shop.dict())
+    shop_dict = shop.dict()
     await db.shops.insert_one(shop_dict)
+    shop_ids_cache.pop(current_user.id, None)
     
     return {"message": "Shop created successfully", "shop": shop}
 
-@api_router.get("/shops")
-async def get_shops(district: str = None, taluk: str = None, village_city: str = None):
+@api_router.get("/shops", responses={200: {"model": List[Shop]}})
+async def get_shops(district: str = None, taluk: str = None, village_city: str = None, limit: int = DEFAULT_PAGE_SIZE, skip: int = 0):
     filter_query = {}
     if district:
         filter_query["district"] = district
@@ -288,16 +364,18 @@ async def get_shops(district: str = None, taluk: str = None, village_city: str =
     if village_city:
         filter_query["village_city"] = village_city
     
-    shops = await db.shops.find(filter_query, {"_id": 0}).to_list(1000)
-    return [Shop(**parse_from_mongo(shop)) for shop in shops]
+    skip, limit = page_bounds(skip, limit)
+    shops = await db.shops.find(filter_query, SHOP_FIELDS).sort(PAGE_SORT).skip(skip).limit(limit).to_list(limit)
+    return ShopList.validate_python(shops)
 
-@api_router.get("/shops/my")
-async def get_my_shops(current_user: UserBase = Depends(get_current_user)):
+@api_router.get("/shops/my", responses={200: {"model": List[Shop]}})
+async def get_my_shops(limit: int = DEFAULT_PAGE_SIZE, skip: int = 0, current_user: UserBase = Depends(get_current_user)):
     if current_user.user_type != "shop_owner":
         raise HTTPException(status_code=403, detail="Only shop owners can access this")
     
-    shops = await db.shops.find({"owner_id": current_user.id}, {"_id": 0}).to_list(1000)
-    return [Shop(**parse_from_mongo(shop)) for shop in shops]
+    skip, limit = page_bounds(skip, limit)
+    shops = await db.shops.find({"owner_id": current_user.id}, SHOP_FIELDS).sort(PAGE_SORT).skip(skip).limit(limit).to_list(limit)
+    return ShopList.validate_python(shops)
 
 # Product Routes
 @api_router.post("/shops/{shop_id}/products")
@@ -308,18 +386,22 @@ async def create_product(shop_id: str, product_data: ProductCreate, current_user
         raise HTTPException(status_code=404, detail="Shop not found or not owned by user")
     
     product = Product(**product_data.dict(), shop_id=shop_id)
-    product_dict = prepare_for_mongo(product.dict())
+    product_dict = product.dict()
+    product_dict["name_lc"] = product.name.lower()
     await db.products.insert_one(product_dict)
     
     return {"message": "Product created successfully", "product": product}
 
-@api_router.get("/shops/{shop_id}/products")
-async def get_shop_products(shop_id: str):
-    products = await db.products.find({"shop_id": shop_id, "is_active": True}, {"_id": 0}).to_list(1000)
-    return [Product(**parse_from_mongo(product)) for product in products]
+@api_router.get("/shops/{shop_id}/products", responses={200: {"model": List[Product]}})
+async def get_shop_products(shop_id: str, limit: int = DEFAULT_PAGE_SIZE, skip: int = 0):
+    skip, limit = page_bounds(skip, limit)
+    products = await db.products.find({"shop_id": shop_id, "is_active": True}, PRODUCT_FIELDS).sort(PAGE_SORT).skip(skip).limit(limit).to_list(limit)
+    return ProductList.validate_python(products)
 
-@api_router.get("/products/search")
-async def search_products(query: str = "", district: str = None, taluk: str = None, category: str = None):
+@api_router.get("/products/search", responses={200: {"model": List[Product]}})
+async def search_products(query: str = "", district: str = None, taluk: str = None, category: str = None, limit: int = DEFAULT_PAGE_SIZE, skip: int = 0):
+    skip, limit = page_bounds(skip, limit)
+    
     # Build filter for location-based shops
     shop_filter = {}
     if district:
@@ -328,21 +410,38 @@ async def search_products(query: str = "", district: str = None, taluk: str = No
         shop_filter["taluk"] = taluk
     
     # Get shops in the area
-    shops = await db.shops.find(shop_filter).to_list(1000)
+    shops = await db.shops.find(shop_filter, {"_id": 0, "id": 1}).to_list(1000)
     shop_ids = [shop["id"] for shop in shops]
     
     # Build product filter
     product_filter = {"shop_id": {"$in": shop_ids}, "is_active": True}
     if category:
         product_filter["category"] = category
-    if query:
-        product_filter["$or"] = [
-            {"name": {"$regex": query, "$options": "i"}},
-            {"description": {"$regex": query, "$options": "i"}}
-        ]
-    
-    products = await db.products.find(product_filter, {"_id": 0}).to_list(1000)
-    return [Product(**parse_from_mongo(product)) for product in products]
+    if not query:
+        products = await db.products.find(product_filter, PRODUCT_FIELDS).sort(PAGE_SORT).skip(skip).limit(limit).to_list(limit)
+        return ProductList.validate_python(products)
+    
+    # Full words go through the text index, ranked by relevance
+    products = []
+    use_text_index = len(query) >= MIN_TEXT_SEARCH_LENGTH
+    if use_text_index:
+        text_filter = {**product_filter, "$text": {"$search": query}}
+        products = await db.products.find(
+            text_filter,
+            {**PRODUCT_FIELDS, "score": {"$meta": "textScore"}}
+        ).sort([("score", {"$meta": "textScore"})]).skip(skip).limit(limit).to_list(limit)
+        # An empty later page only means the text matches ran out, not that there were none
+        if not products and skip > 0:
+            use_text_index = await db.products.find_one(text_filter, {"_id": 1}) is not None
+        else:
+            use_text_index = bool(products)
+    
+    # Short or partial queries fall back to an anchored prefix match on the indexed lowercase name
+    if not use_text_index:
+        prefix_filter = {**product_filter, "name_lc": {"$regex": f"^{re.escape(query.lower())}"}}
+        products = await db.products.find(prefix_filter, PRODUCT_FIELDS).sort(PAGE_SORT).skip(skip).limit(limit).to_list(limit)
+    
+    return ProductList.validate_python(products)
 
 # Cart Routes
 @api_router.post("/cart")
@@ -359,7 +458,7 @@ async def add_to_cart(cart_item: CartItemCreate, current_user: UserBase = Depend
     if existing_item:
         # Update quantity
         new_quantity = existing_item["quantity"] + cart_item.quantity
-        await db.cart.update_one(
+        await cart_writes.update_one(
             {"id": existing_item["id"]},
             {"$set": {"quantity": new_quantity}}
         )
@@ -367,8 +466,8 @@ async def add_to_cart(cart_item: CartItemCreate, current_user: UserBase = Depend
     else:
         # Add new item
         item = CartItem(**cart_item.dict(), customer_id=current_user.id)
-        item_dict = prepare_for_mongo(item.dict())
-        await db.cart.insert_one(item_dict)
+        item_dict = item.dict()
+        await cart_writes.insert_one(item_dict)
         return {"message": "Item added to cart successfully"}
 
 @api_router.get("/cart")
@@ -376,27 +475,26 @@ async def get_cart(current_user: UserBase = Depends(get_current_user)):
     if current_user.user_type != "customer":
         raise HTTPException(status_code=403, detail="Only customers can access cart")
     
-    cart_items = await db.cart.find({"customer_id": current_user.id}, {"_id": 0}).to_list(1000)
-    
-    # Get product details for each cart item
-    enriched_items = []
-    for item in cart_items:
+    # Join each cart item with its product server-side in a single round-trip
+    cursor = await db.cart.aggregate([
+        {"$match": {"customer_id": current_user.id}},
+        {"$lookup": {"from": "products", "localField": "product_id", "foreignField": "id", "as": "product"}},
+        {"$unwind": "$product"},
+        {"$project": {"_id": 0, "product._id": 0}}
+    ])
+    cart_items = await cursor.to_list(1000)
+    
+    products = ProductList.validate_python([item["product"] for item in cart_items])
+    for item, product in zip(cart_items, products):
         # Parse cart item from mongo to handle datetime fields
-        parsed_item = parse_from_mongo(item)
-        
-        product = await db.products.find_one({"id": item["product_id"]}, {"_id": 0})
-        if product:
-            enriched_item = {
-                **parsed_item,
-                "product": Product(**parse_from_mongo(product))
-            }
-            enriched_items.append(enriched_item)
+        parse_from_mongo(item)
+        item["product"] = product
     
-    return enriched_items
+    return cart_items
 
 @api_router.delete("/cart/{item_id}")
 async def remove_from_cart(item_id: str, current_user: UserBase = Depends(get_current_user)):
-    result = await db.cart.delete_one({"id": item_id, "customer_id": current_user.id})
+    result = await cart_writes.delete_one({"id": item_id, "customer_id": current_user.id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Cart item not found")
     return {"message": "Item removed from cart"}
@@ -408,76 +506,82 @@ async def create_order(order_data: OrderCreate, current_user: UserBase = Depends
         raise HTTPException(status_code=403, detail="Only customers can place orders")
     
     order = Order(**order_data.dict(), customer_id=current_user.id)
-    order_dict = prepare_for_mongo(order.dict())
-    await db.orders.insert_one(order_dict)
-    
+    order_dict = order.dict()
     # Clear cart items for this order
-    product_ids = [item["product_id"] for item in order_data.items]
-    await db.cart.delete_many({
-        "customer_id": current_user.id,
-        "product_id": {"$in": product_ids}
-    })
+    cart_filter = {"customer_id": current_user.id, "product_id": {"$in": [item["product_id"] for item in order.items]}}
+    
+    if transactions_supported:
+        # Placing the order and clearing its cart rows commit together; with_transaction
+        # retries the whole callback on transient errors such as a write conflict with
+        # a concurrent cart update, and retries the commit if its outcome is unknown
+        async def place_order(session):
+            await db.orders.insert_one(order_dict, session=session)
+            await db.cart.delete_many(cart_filter, session=session)
+        
+        async with client.start_session() as session:
+            await session.with_transaction(place_order)
+    else:
+        # Standalone servers have no transactions; insert first so a failure never loses the cart
+        await db.orders.insert_one(order_dict)
+        await db.cart.delete_many(cart_filter)
     
     return {"message": "Order placed successfully", "order": order}
 
-@api_router.get("/orders")
-async def get_orders(current_user: UserBase = Depends(get_current_user)):
+@api_router.get("/orders", responses={200: {"model": List[Order]}})
+async def get_orders(limit: int = DEFAULT_PAGE_SIZE, skip: int = 0, current_user: UserBase = Depends(get_current_user)):
+    skip, limit = page_bounds(skip, limit)
     if current_user.user_type == "customer":
-        orders = await db.orders.find({"customer_id": current_user.id}, {"_id": 0}).to_list(1000)
+        orders = await db.orders.find({"customer_id": current_user.id}, ORDER_FIELDS).sort(PAGE_SORT).skip(skip).limit(limit).to_list(limit)
     elif current_user.user_type == "shop_owner":
-        # Get orders for shops owned by this user
-        shops = await db.shops.find({"owner_id": current_user.id}, {"_id": 0}).to_list(1000)
-        shop_ids = [shop["id"] for shop in shops]
-        orders = await db.orders.find({"shop_id": {"$in": shop_ids}}, {"_id": 0}).to_list(1000)
+        # Get orders for shops owned by this user; the (shop_id, created_at, id) index serves the sort
+        shop_ids = await get_owned_shop_ids(current_user.id)
+        orders = await db.orders.find({"shop_id": {"$in": shop_ids}}, ORDER_FIELDS).sort(PAGE_SORT).skip(skip).limit(limit).to_list(limit)
     elif current_user.user_type == "delivery_person":
-        orders = await db.orders.find({"delivery_person_id": current_user.id}, {"_id": 0}).to_list(1000)
+        orders = await db.orders.find({"delivery_person_id": current_user.id}, ORDER_FIELDS).sort(PAGE_SORT).skip(skip).limit(limit).to_list(limit)
     else:
         orders = []
     
-    return [Order(**parse_from_mongo(order)) for order in orders]
+    return OrderList.validate_python(orders)
 
 class OrderStatusUpdate(BaseModel):
     status: str
 
 @api_router.patch("/orders/{order_id}/status")
 async def update_order_status(order_id: str, status_update: OrderStatusUpdate, current_user: UserBase = Depends(get_current_user)):
-    # Verify user can update this order
-    order = await db.orders.find_one({"id": order_id})
-    if not order:
-        raise HTTPException(status_code=404, detail="Order not found")
-    
-    # Check permissions
-    can_update = False
-    if current_user.user_type == "shop_owner":
-        shop = await db.shops.find_one({"id": order["shop_id"], "owner_id": current_user.id})
-        if shop:
-            can_update = True
-    elif current_user.user_type == "delivery_person" and order.get("delivery_person_id") == current_user.id:
-        can_update = True
-    
-    if not can_update:
-        raise HTTPException(status_code=403, detail="Not authorized to update this order")
-    
     update_data = {"status": status_update.status}
     if status_update.status == "delivered":
-        update_data["delivered_at"] = datetime.now(timezone.utc).isoformat()
-    
-    await db.orders.update_one({"id": order_id}, {"$set": update_data})
+        update_data["delivered_at"] = datetime.now(timezone.utc)
     
-    return {"message": "Order status updated successfully"}
+    # Check permissions as part of the update filter, so an allowed update is a single round-trip
+    order_filter = None
+    if current_user.user_type == "shop_owner":
+        shop_ids = await get_owned_shop_ids(current_user.id)
+        order_filter = {"id": order_id, "shop_id": {"$in": shop_ids}}
+    elif current_user.user_type == "delivery_person":
+        order_filter = {"id": order_id, "delivery_person_id": current_user.id}
+    
+    if order_filter is not None:
+        result = await db.orders.update_one(order_filter, {"$set": update_data})
+        if not result.matched_count and current_user.user_type == "shop_owner":
+            # The cached shop IDs are per process and may miss a shop just created through
+            # another worker, so recheck against the database before refusing
+            fresh_shop_ids = await get_owned_shop_ids(current_user.id, refresh=True)
+            if fresh_shop_ids != shop_ids:
+                order_filter["shop_id"] = {"$in": fresh_shop_ids}
+                result = await db.orders.update_one(order_filter, {"$set": update_data})
+        if result.matched_count:
+            return {"message": "Order status updated successfully"}
+    
+    # Nothing matched: tell a missing order apart from one this user may not update
+    if not await db.orders.find_one({"id": order_id}, {"_id": 1}):
+        raise HTTPException(status_code=404, detail="Order not found")
+    raise HTTPException(status_code=403, detail="Not authorized to update this order")
 
 # AI Assistant Route
-@api_router.post("/ai/assistant")
-async def ai_assistant(request: AIAssistantRequest, current_user: UserBase = Depends(get_current_user)):
-    try:
-        # Initialize AI chat with Emergent LLM key
-        chat = LlmChat(
-            api_key=os.environ.get('EMERGENT_LLM_KEY'),
-            session_id=f"orderbuddy_{current_user.id}",
-            system_message=f"""You are OrderBuddy AI Assistant, helping users with their shopping needs in Tamil Nadu. 
-            You are assisting a {current_user.user_type} named {current_user.name} from {current_user.village_city}, {current_user.taluk}, {current_user.district}.
+AI_SYSTEM_TEMPLATE = """You are OrderBuddy AI Assistant, helping users with their shopping needs in Tamil Nadu. 
+            You are assisting a {user.user_type} named {user.name} from {user.village_city}, {user.taluk}, {user.district}.
             
-            Context: {request.context}
+            Context: {context}
             
             Be helpful, friendly, and provide concise responses about:
             - Product recommendations
@@ -486,13 +590,36 @@ async def ai_assistant(request: AIAssistantRequest, current_user: UserBase = Dep
             - Local shopping guidance
             
             Always respond in a helpful and professional manner."""
-        ).with_model("openai", "gpt-4o-mini")
+
+# Cached chats keep their conversation history, so the assistant holds a multi-turn
+# conversation per (user, context). To bound the prompt that history adds to every
+# request, a chat starts over after MAX_CHAT_TURNS messages or an hour, whichever
+# comes first; each chat has a lock that serializes concurrent messages to it
+MAX_CHAT_TURNS = 10
+chat_sessions = TTLCache(maxsize=1000, ttl=3600)
+
+@api_router.post("/ai/assistant")
+async def ai_assistant(request: AIAssistantRequest, current_user: UserBase = Depends(get_current_user)):
+    try:
+        # Reuse the user's chat for this context so the session is not re-primed on every message
+        chat_key = (current_user.id, request.context)
+        session = chat_sessions.get(chat_key)
+        if session is None or session["turns"] >= MAX_CHAT_TURNS:
+            # Initialize AI chat with Emergent LLM key; a fresh session id so no history carries over
+            chat = LlmChat(
+                api_key=os.environ.get('EMERGENT_LLM_KEY'),
+                session_id=f"orderbuddy_{current_user.id}_{uuid.uuid4().hex}",
+                system_message=AI_SYSTEM_TEMPLATE.format(user=current_user, context=request.context)
+            ).with_model("openai", "gpt-4o-mini")
+            session = chat_sessions[chat_key] = {"chat": chat, "lock": asyncio.Lock(), "turns": 0}
+        session["turns"] += 1
         
         # Create user message
         user_message = UserMessage(text=request.message)
         
-        # Get AI response
-        response = await chat.send_message(user_message)
+        # Get AI response; the chat keeps conversation state, so one message at a time per chat
+        async with session["lock"]:
+            response = await session["chat"].send_message(user_message)
         
         return {
             "response": response,
@@ -508,12 +635,14 @@ async def ai_assistant(request: AIAssistantRequest, current_user: UserBase = Dep
 async def get_dashboard_stats(current_user: UserBase = Depends(get_current_user)):
     if current_user.user_type == "shop_owner":
         # Get shop owner statistics
-        shops = await db.shops.find({"owner_id": current_user.id}).to_list(1000)
-        shop_ids = [shop["id"] for shop in shops]
+        shop_ids = await get_owned_shop_ids(current_user.id)
         
-        total_shops = len(shops)
-        total_products = await db.products.count_documents({"shop_id": {"$in": shop_ids}})
-        total_orders = await db.orders.count_documents({"shop_id": {"$in": shop_ids}})
+        total_shops = len(shop_ids)
+        # The counts are independent once the shop IDs are known, so run them concurrently
+        total_products, total_orders = await asyncio.gather(
+            db.products.count_documents({"shop_id": {"$in": shop_ids}}),
+            db.orders.count_documents({"shop_id": {"$in": shop_ids}})
+        )
         
         return {
             "total_shops": total_shops,
@@ -523,8 +652,10 @@ async def get_dashboard_stats(current_user: UserBase = Depends(get_current_user)
         }
     
     elif current_user.user_type == "customer":
-        total_orders = await db.orders.count_documents({"customer_id": current_user.id})
-        cart_items = await db.cart.count_documents({"customer_id": current_user.id})
+        total_orders, cart_items = await asyncio.gather(
+            db.orders.count_documents({"customer_id": current_user.id}),
+            db.cart.count_documents({"customer_id": current_user.id})
+        )
         
         return {
             "total_orders": total_orders,
@@ -533,11 +664,13 @@ async def get_dashboard_stats(current_user: UserBase = Depends(get_current_user)
         }
     
     elif current_user.user_type == "delivery_person":
-        total_deliveries = await db.orders.count_documents({"delivery_person_id": current_user.id})
-        pending_deliveries = await db.orders.count_documents({
-            "delivery_person_id": current_user.id,
-            "status": {"$in": ["on_the_way", "packed"]}
-        })
+        total_deliveries, pending_deliveries = await asyncio.gather(
+            db.orders.count_documents({"delivery_person_id": current_user.id}),
+            db.orders.count_documents({
+                "delivery_person_id": current_user.id,
+                "status": {"$in": ["on_the_way", "packed"]}
+            })
+        )
         
         return {
             "total_deliveries": total_deliveries,
@@ -557,83 +690,89 @@ async def seed_sample_data():
         # Sample users data
         sample_users = [
             {
-                "email": "ravi@shop.com", "password": hash_password("password123"), "name": "Ravi Kumar", 
+                "email": "ravi@shop.com", "password": await hash_password("password123"), "name": "Ravi Kumar", 
                 "phone": "+91-9876543210", "user_type": "shop_owner", "district": "Chennai", 
-                "taluk": "Chennai Central", "village_city": "Egmore", "id": str(uuid.uuid4()), 
-                "created_at": datetime.now(timezone.utc).isoformat(), "is_active": True
+                "taluk": "Chennai Central", "village_city": "Egmore", "id": uuid.uuid4().hex, 
+                "created_at": datetime.now(timezone.utc), "is_active": True
             },
             {
-                "email": "priya@customer.com", "password": hash_password("password123"), "name": "Priya Rajesh", 
+                "email": "priya@customer.com", "password": await hash_password("password123"), "name": "Priya Rajesh", 
                 "phone": "+91-8765432109", "user_type": "customer", "district": "Chennai", 
-                "taluk": "Chennai Central", "village_city": "Egmore", "id": str(uuid.uuid4()), 
-                "created_at": datetime.now(timezone.utc).isoformat(), "is_active": True
+                "taluk": "Chennai Central", "village_city": "Egmore", "id": uuid.uuid4().hex, 
+                "created_at": datetime.now(timezone.utc), "is_active": True
             },
             {
-                "email": "kumar@delivery.com", "password": hash_password("password123"), "name": "Kumar Murugan", 
+                "email": "kumar@delivery.com", "password": await hash_password("password123"), "name": "Kumar Murugan", 
                 "phone": "+91-7654321098", "user_type": "delivery_person", "district": "Chennai", 
-                "taluk": "Chennai Central", "village_city": "Egmore", "id": str(uuid.uuid4()), 
-                "created_at": datetime.now(timezone.utc).isoformat(), "is_active": True
+                "taluk": "Chennai Central", "village_city": "Egmore", "id": uuid.uuid4().hex, 
+                "created_at": datetime.now(timezone.utc), "is_active": True
             },
             {
-                "email": "lakshmi@shop.com", "password": hash_password("password123"), "name": "Lakshmi Devi", 
+                "email": "lakshmi@shop.com", "password": await hash_password("password123"), "name": "Lakshmi Devi", 
                 "phone": "+91-6543210987", "user_type": "shop_owner", "district": "Coimbatore", 
-                "taluk": "Coimbatore North", "village_city": "Gandhipuram", "id": str(uuid.uuid4()), 
-                "created_at": datetime.now(timezone.utc).isoformat(), "is_active": True
+                "taluk": "Coimbatore North", "village_city": "Gandhipuram", "id": uuid.uuid4().hex, 
+                "created_at": datetime.now(timezone.utc), "is_active": True
             },
             {
-                "email": "arun@customer.com", "password": hash_password("password123"), "name": "Arun Selvam", 
+                "email": "arun@customer.com", "password": await hash_password("password123"), "name": "Arun Selvam", 
                 "phone": "+91-5432109876", "user_type": "customer", "district": "Madurai", 
-                "taluk": "Madurai East", "village_city": "Anna Nagar", "id": str(uuid.uuid4()), 
-                "created_at": datetime.now(timezone.utc).isoformat(), "is_active": True
+                "taluk": "Madurai East", "village_city": "Anna Nagar", "id": uuid.uuid4().hex, 
+                "created_at": datetime.now(timezone.utc), "is_active": True
             }
         ]
         
-        # Insert users if not exists
-        for user in sample_users:
-            existing = await db.users.find_one({"email": user["email"]})
-            if not existing:
-                await db.users.insert_one(user)
+        # Insert users if not exists, checking all emails in one query
+        sample_emails = [user["email"] for user in sample_users]
+        existing_users = await db.users.find({"email": {"$in": sample_emails}}, {"_id": 0, "email": 1}).to_list(len(sample_emails))
+        existing_emails = {user["email"] for user in existing_users}
+        new_users = [user for user in sample_users if user["email"] not in existing_emails]
+        if new_users:
+            await db.users.insert_many(new_users)
         
         # Get shop owner IDs for creating shops
-        ravi_user = await db.users.find_one({"email": "ravi@shop.com"})
-        lakshmi_user = await db.users.find_one({"email": "lakshmi@shop.com"})
+        owners = await db.users.find({"email": {"$in": ["ravi@shop.com", "lakshmi@shop.com"]}}, {"_id": 0, "id": 1, "email": 1}).to_list(2)
+        owners_by_email = {owner["email"]: owner for owner in owners}
+        ravi_user = owners_by_email["ravi@shop.com"]
+        lakshmi_user = owners_by_email["lakshmi@shop.com"]
         
         # Sample shops data
         sample_shops = [
             {
-                "id": str(uuid.uuid4()), "name": "Ravi's Fresh Grocery", 
+                "id": uuid.uuid4().hex, "name": "Ravi's Fresh Grocery", 
                 "description": "Fresh vegetables, fruits, and daily essentials", 
                 "owner_id": ravi_user["id"], "district": "Chennai", "taluk": "Chennai Central", 
                 "village_city": "Egmore", "is_open": True, "opening_time": "07:00", 
                 "closing_time": "22:00", "rating": 4.5, "total_ratings": 124, 
-                "created_at": datetime.now(timezone.utc).isoformat()
+                "created_at": datetime.now(timezone.utc)
             },
             {
-                "id": str(uuid.uuid4()), "name": "Tamil Nadu Snacks Corner", 
+                "id": uuid.uuid4().hex, "name": "Tamil Nadu Snacks Corner", 
                 "description": "Traditional Tamil snacks, sweets, and beverages", 
                 "owner_id": ravi_user["id"], "district": "Chennai", "taluk": "Chennai Central", 
                 "village_city": "Egmore", "is_open": True, "opening_time": "09:00", 
                 "closing_time": "21:00", "rating": 4.2, "total_ratings": 89, 
-                "created_at": datetime.now(timezone.utc).isoformat()
+                "created_at": datetime.now(timezone.utc)
             },
             {
-                "id": str(uuid.uuid4()), "name": "Lakshmi's Organic Store", 
+                "id": uuid.uuid4().hex, "name": "Lakshmi's Organic Store", 
                 "description": "Organic vegetables, grains, and health products", 
                 "owner_id": lakshmi_user["id"], "district": "Coimbatore", "taluk": "Coimbatore North", 
                 "village_city": "Gandhipuram", "is_open": True, "opening_time": "08:00", 
                 "closing_time": "20:00", "rating": 4.7, "total_ratings": 156, 
-                "created_at": datetime.now(timezone.utc).isoformat()
+                "created_at": datetime.now(timezone.utc)
             }
         ]
         
-        # Insert shops if not exists
-        for shop in sample_shops:
-            existing = await db.shops.find_one({"name": shop["name"]})
-            if not existing:
-                await db.shops.insert_one(shop)
+        # Insert shops if not exists, checking all names in one query
+        sample_shop_names = [shop["name"] for shop in sample_shops]
+        existing_shops = await db.shops.find({"name": {"$in": sample_shop_names}}, {"_id": 0, "name": 1}).to_list(len(sample_shop_names))
+        existing_shop_names = {shop["name"] for shop in existing_shops}
+        new_shops = [shop for shop in sample_shops if shop["name"] not in existing_shop_names]
+        if new_shops:
+            await db.shops.insert_many(new_shops)
         
         # Get shop IDs for creating products
-        shops = await db.shops.find({}, {"_id": 0}).to_list(10)
+        shops = await db.shops.find({"name": {"$in": sample_shop_names}}, {"_id": 0}).to_list(len(sample_shop_names))
         
         # Sample products data with images
         sample_products = []
@@ -650,8 +789,8 @@ async def seed_sample_data():
             ]
             for product in grocery_products:
                 product.update({
-                    "id": str(uuid.uuid4()), "shop_id": grocery_shop["id"], 
-                    "created_at": datetime.now(timezone.utc).isoformat(), "is_active": True
+                    "id": uuid.uuid4().hex, "shop_id": grocery_shop["id"], "name_lc": product["name"].lower(),
+                    "created_at": datetime.now(timezone.utc), "is_active": True
                 })
                 sample_products.append(product)
         
@@ -667,8 +806,8 @@ async def seed_sample_data():
             ]
             for product in snack_products:
                 product.update({
-                    "id": str(uuid.uuid4()), "shop_id": snacks_shop["id"], 
-                    "created_at": datetime.now(timezone.utc).isoformat(), "is_active": True
+                    "id": uuid.uuid4().hex, "shop_id": snacks_shop["id"], "name_lc": product["name"].lower(),
+                    "created_at": datetime.now(timezone.utc), "is_active": True
                 })
                 sample_products.append(product)
         
@@ -684,16 +823,18 @@ async def seed_sample_data():
             ]
             for product in organic_products:
                 product.update({
-                    "id": str(uuid.uuid4()), "shop_id": organic_shop["id"], 
-                    "created_at": datetime.now(timezone.utc).isoformat(), "is_active": True
+                    "id": uuid.uuid4().hex, "shop_id": organic_shop["id"], "name_lc": product["name"].lower(),
+                    "created_at": datetime.now(timezone.utc), "is_active": True
                 })
                 sample_products.append(product)
         
-        # Insert products if not exists
-        for product in sample_products:
-            existing = await db.products.find_one({"name": product["name"], "shop_id": product["shop_id"]})
-            if not existing:
-                await db.products.insert_one(product)
+        # Insert products if not exists, checking all (name, shop) pairs in one query
+        sample_shop_ids = list({product["shop_id"] for product in sample_products})
+        existing_products = await db.products.find({"shop_id": {"$in": sample_shop_ids}}, {"_id": 0, "name": 1, "shop_id": 1}).to_list(None)
+        existing_keys = {(product["name"], product["shop_id"]) for product in existing_products}
+        new_products = [product for product in sample_products if (product["name"], product["shop_id"]) not in existing_keys]
+        if new_products:
+            await db.products.insert_many(new_products)
         
         return {
             "message": "Sample data seeded successfully!",
@@ -728,6 +869,57 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def detect_transaction_support():
+    # Multi-document transactions need a replica set member or a mongos router
+    global transactions_supported
+    try:
+        hello = await client.admin.command("hello")
+    except Exception as e:
+        logger.warning(f"Could not detect MongoDB topology, transactions disabled: {e}")
+        return
+    transactions_supported = "setName" in hello or hello.get("msg") == "isdbgrid"
+
+async def ensure_index(collection, keys, **kwargs):
+    try:
+        await collection.create_index(keys, **kwargs)
+    except PyMongoError as e:
+        # Existing data can violate a new unique index (e.g. duplicate emails from the old
+        # find-then-insert race), or MongoDB may be unreachable at boot; keep serving either way
+        logger.error(f"Could not create index {keys} on {collection.name}: {e}")
+
+@app.on_event("startup")
+async def create_indexes():
+    # Fail fast once instead of waiting out the server selection timeout for every index
+    try:
+        await client.admin.command("ping")
+    except PyMongoError as e:
+        logger.error(f"MongoDB unreachable, skipping index creation: {e}")
+        return
+    
+    # Every route filters on these fields; without indexes each query is a collection scan
+    await ensure_index(db.users, "email", unique=True)
+    await ensure_index(db.users, "id", unique=True)
+    await ensure_index(db.shops, "id", unique=True)
+    await ensure_index(db.shops, [("owner_id", 1), *PAGE_SORT])
+    await ensure_index(db.shops, [("district", 1), ("taluk", 1), ("village_city", 1)])
+    await ensure_index(db.shops, PAGE_SORT)
+    await ensure_index(db.products, "id", unique=True)
+    await ensure_index(db.products, [("shop_id", 1), ("is_active", 1), *PAGE_SORT])
+    await ensure_index(db.products, [("name", "text"), ("description", "text")])
+    await ensure_index(db.products, [("name_lc", 1)])
+    await ensure_index(db.cart, [("customer_id", 1), ("product_id", 1)])
+    await ensure_index(db.orders, "id", unique=True)
+    await ensure_index(db.orders, [("customer_id", 1), *PAGE_SORT])
+    await ensure_index(db.orders, [("shop_id", 1), *PAGE_SORT])
+    await ensure_index(db.orders, [("delivery_person_id", 1), *PAGE_SORT])
+
+    # Products written before name_lc existed would never match the prefix search fallback
+    try:
+        await db.products.update_many({"name_lc": {"$exists": False}}, [{"$set": {"name_lc": {"$toLower": "$name"}}}])
+    except PyMongoError as e:
+        logger.error(f"Could not backfill product name_lc: {e}")
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    await client.close()
\ No newline at end of file
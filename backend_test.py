@@ -4,223 +4,373 @@ OrderBuddy Backend API Testing Suite
 Tests all backend functionality including authentication, shop management, cart operations, orders, AI assistant, and dashboard stats.
 """
 
-import requests
+import httpx
+import argparse
 import json
+import orjson
 import time
-from datetime import datetime
-from typing import Dict, Any, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional, Callable, List, Tuple
 
 # Configuration
 BASE_URL = "https://shop-connect-tn.preview.emergentagent.com/api"
 TIMEOUT = 30
+MAX_WORKERS = 8
+
+# Transient gateway errors are retried with exponential backoff, but never on POST,
+# since retrying one could register a user or place an order twice. PATCH is not
+# idempotent in general; it is retried here because this suite's only PATCH sets an
+# order's status to a fixed value, which leaves the same result when sent twice
+RETRY_STATUSES = (429, 502, 503, 504)
+RETRY_METHODS = frozenset(["GET", "PATCH", "DELETE"])
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.3
+
+# Upper bound on a single wait requested by the server's rate limit headers
+MAX_PACING_DELAY = 60
+
+# X-RateLimit-Reset is sent either as a Unix timestamp or as seconds until the reset;
+# values from this one (September 2001) upwards are timestamps, anything below is a delay
+RATE_LIMIT_RESET_EPOCH_MIN = 1_000_000_000
+
+# Static test data, also used by tests/test_backend.py; "{run_id}" keeps each run's emails unique
+TEST_PASSWORD = "SecurePass123!"
+
+USER_TYPES = (
+    {
+        "type": "customer",
+        "email": "priya.customer.{run_id}@orderbuddy.com",
+        "name": "Priya Sharma",
+        "phone": "+91-9876543210",
+        "district": "Chennai",
+        "taluk": "Chennai North",
+        "village_city": "Washermanpet"
+    },
+    {
+        "type": "shop_owner",
+        "email": "ravi.shopowner.{run_id}@orderbuddy.com",
+        "name": "Ravi Kumar",
+        "phone": "+91-9876543211",
+        "district": "Coimbatore",
+        "taluk": "Coimbatore South",
+        "village_city": "Singanallur"
+    },
+    {
+        "type": "delivery_person",
+        "email": "kumar.delivery.{run_id}@orderbuddy.com",
+        "name": "Kumar Raj",
+        "phone": "+91-9876543212",
+        "district": "Madurai",
+        "taluk": "Melur",
+        "village_city": "Melur"
+    }
+)
+
+SHOP_PAYLOAD = {
+    "name": "Ravi's General Store",
+    "description": "Fresh groceries and daily essentials in Coimbatore",
+    "district": "Coimbatore",
+    "taluk": "Coimbatore South",
+    "village_city": "Singanallur",
+    "opening_time": "08:00",
+    "closing_time": "22:00"
+}
+
+PRODUCTS = (
+    {
+        "name": "Basmati Rice",
+        "description": "Premium quality basmati rice - 1kg pack",
+        "price": 120.0,
+        "category": "Groceries",
+        "stock_quantity": 50,
+        "image_url": "https://example.com/rice.jpg"
+    },
+    {
+        "name": "Fresh Tomatoes",
+        "description": "Farm fresh tomatoes - per kg",
+        "price": 40.0,
+        "category": "Vegetables",
+        "stock_quantity": 25,
+        "image_url": "https://example.com/tomatoes.jpg"
+    }
+)
+
+EXPECTED_STATS_FIELDS = {
+    "customer": ["total_orders", "cart_items"],
+    "shop_owner": ["total_shops", "total_products", "total_orders"],
+    "delivery_person": ["total_deliveries", "pending_deliveries"]
+}
+
+# Request bodies that never change are encoded once at import
+SHOP_PAYLOAD_BYTES = orjson.dumps(SHOP_PAYLOAD)
+PRODUCTS_BYTES = tuple(orjson.dumps(product) for product in PRODUCTS)
 
 class OrderBuddyTester:
-    def __init__(self):
-        self.base_url = BASE_URL
-        self.session = requests.Session()
-        self.session.timeout = TIMEOUT
+    __slots__ = (
+        "base_url", "client",
+        "test_users", "test_shops", "test_products", "test_orders",
+        "passed_tests", "failed_tests", "errors",
+        "_lock", "verbose"
+    )
+    
+    def __init__(self, base_url: Optional[str] = None, verbose: bool = False) -> None:
+        self.base_url = base_url or BASE_URL
+        # HTTP/2 multiplexes the concurrent tests over a single TLS connection to the API host
+        self.client = httpx.Client(
+            base_url=self.base_url,
+            timeout=TIMEOUT,
+            headers={"Content-Type": "application/json"},
+            transport=httpx.HTTPTransport(
+                http2=True,
+                retries=3,
+                limits=httpx.Limits(max_keepalive_connections=16, max_connections=32)
+            )
+        )
         
         # Test data storage
-        self.test_users = {}
-        self.test_shops = {}
-        self.test_products = {}
-        self.test_orders = {}
+        self.test_users: Dict[str, Dict[str, Any]] = {}
+        self.test_shops: Dict[str, Dict[str, Any]] = {}
+        self.test_products: Dict[str, Dict[str, Any]] = {}
+        self.test_orders: Dict[str, Dict[str, Any]] = {}
         
         # Test results
-        self.results = {
-            "total_tests": 0,
-            "passed_tests": 0,
-            "failed_tests": 0,
-            "errors": []
-        }
+        self.passed_tests = 0
+        self.failed_tests = 0
+        self.errors: List[str] = []
+        
+        # Tests run on worker threads, so result and test data updates are serialized
+        self._lock = threading.Lock()
+        
+        # Passing checks are only printed in verbose mode; failures are always printed
+        self.verbose = verbose
+    
+    def __enter__(self) -> "OrderBuddyTester":
+        return self
+    
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
     
-    def log_result(self, test_name: str, success: bool, message: str = "", error: str = ""):
-        """Log test result"""
-        self.results["total_tests"] += 1
+    def close(self) -> None:
+        """Release the pooled connections held by the HTTP client"""
+        self.client.close()
+    
+    def log_result(self, test_name: str, success: bool, message: str = "", error: str = "", error_provider: Optional[Callable[[], str]] = None) -> None:
+        """Log test result; error_provider builds the error text only if the test failed"""
         if success:
-            self.results["passed_tests"] += 1
-            print(f"✅ {test_name}: {message}")
-        else:
-            self.results["failed_tests"] += 1
-            error_msg = f"❌ {test_name}: {message} | Error: {error}"
-            print(error_msg)
-            self.results["errors"].append(error_msg)
-    
-    def make_request(self, method: str, endpoint: str, data: Dict = None, headers: Dict = None, token: str = None) -> tuple:
+            with self._lock:
+                self.passed_tests += 1
+            if self.verbose:
+                print(f"✅ {test_name}: {message}")
+            return
+        
+        if error_provider is not None:
+            error = error_provider()
+        error_msg = f"❌ {test_name}: {message} | Error: {error}"
+        with self._lock:
+            self.failed_tests += 1
+            self.errors.append(error_msg)
+        print(error_msg)
+    
+    @property
+    def results(self) -> Dict[str, Any]:
+        """Summary of the logged test results"""
+        return {
+            "total_tests": self.passed_tests + self.failed_tests,
+            "passed_tests": self.passed_tests,
+            "failed_tests": self.failed_tests,
+            "errors": self.errors
+        }
+    
+    def make_request(self, method: str, endpoint: str, *, params: Optional[Dict] = None, json_body: Any = None, auth_header: Optional[Dict] = None) -> Tuple[Optional[httpx.Response], Optional[str]]:
         """Make HTTP request with error handling"""
-        url = f"{self.base_url}{endpoint}"
-        
-        # Set headers
-        req_headers = {"Content-Type": "application/json"}
-        if headers:
-            req_headers.update(headers)
-        if token:
-            req_headers["Authorization"] = f"Bearer {token}"
+        method = method.upper()
+        # Content-Type is a client default; the Authorization header is built once per user at login
+        req_headers = auth_header or {}
         
         try:
-            if method.upper() == "GET":
-                response = self.session.get(url, headers=req_headers, params=data)
-            elif method.upper() == "POST":
-                response = self.session.post(url, headers=req_headers, json=data)
-            elif method.upper() == "PATCH":
-                response = self.session.patch(url, headers=req_headers, json=data)
-            elif method.upper() == "DELETE":
-                response = self.session.delete(url, headers=req_headers)
-            else:
-                return None, f"Unsupported method: {method}"
-            
+            for attempt in range(MAX_RETRIES + 1):
+                response = self.client.request(method, endpoint, params=params, content=self._encode(json_body), headers=req_headers)
+                paced = self._maybe_sleep(response)
+                if response.status_code not in RETRY_STATUSES or method not in RETRY_METHODS or attempt == MAX_RETRIES:
+                    break
+                if not paced:
+                    time.sleep(BACKOFF_FACTOR * (2 ** attempt))
             return response, None
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             return None, str(e)
     
-    def test_health_check(self):
+    @staticmethod
+    def _maybe_sleep(response: httpx.Response) -> bool:
+        """Wait only when the server asks for it through Retry-After or an exhausted rate limit"""
+        delay = 0.0
+        retry_after = response.headers.get("Retry-After")
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        reset = response.headers.get("X-RateLimit-Reset")
+        try:
+            if retry_after is not None:
+                delay = float(retry_after)
+            elif remaining is not None and reset is not None and int(remaining) <= 1:
+                delay = float(reset)
+                if delay >= RATE_LIMIT_RESET_EPOCH_MIN:
+                    delay -= time.time()
+        except ValueError:
+            # Retry-After may also be an HTTP date
+            try:
+                delay = (parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds()
+            except (TypeError, ValueError):
+                return False
+        
+        delay = min(delay, MAX_PACING_DELAY)
+        if delay <= 0:
+            return False
+        time.sleep(delay)
+        return True
+    
+    @staticmethod
+    def _encode(data: Any) -> Optional[bytes]:
+        """Encode a JSON request body with orjson, passing pre-encoded bytes through"""
+        if data is None or isinstance(data, bytes):
+            return data
+        return orjson.dumps(data)
+    
+    @staticmethod
+    def _parse(response: httpx.Response) -> Any:
+        """Decode a JSON response body once with orjson and keep the result on the response"""
+        if not hasattr(response, "_json_cached"):
+            setattr(response, "_json_cached", orjson.loads(response.content) if response.content else None)
+        return getattr(response, "_json_cached")
+    
+    def _expect_ok(self, response: Optional[httpx.Response], error: Optional[str], test_name: str, key: Optional[str] = None) -> Any:
+        """Check a response for a 200 status (and key, if given), returning the decoded body or that key's value, or None after logging the failure"""
+        if response is None:
+            self.log_result(test_name, False, "Request failed", error or "")
+            return None
+        
+        if response.status_code != 200:
+            self.log_result(test_name, False, f"Status code: {response.status_code}", error_provider=lambda: response.text)
+            return None
+        
+        data = self._parse(response)
+        if key is None:
+            return data
+        if not isinstance(data, dict) or key not in data:
+            self.log_result(test_name, False, f"Missing {key} in response", error_provider=lambda: str(data))
+            return None
+        return data[key]
+    
+    def test_health_check(self) -> bool:
         """Test API health check"""
         print("\n🔍 Testing Health Check...")
         
-        response, error = self.make_request("GET", "/health")
-        if error:
-            self.log_result("Health Check", False, "Request failed", error)
+        data = self._expect_ok(*self.make_request("GET", "/health"), "Health Check")
+        if data is None:
             return False
         
-        if response.status_code == 200:
-            data = response.json()
-            if data.get("status") == "healthy":
-                self.log_result("Health Check", True, "API is healthy")
-                return True
-            else:
-                self.log_result("Health Check", False, "Unexpected response format", str(data))
-        else:
-            self.log_result("Health Check", False, f"Status code: {response.status_code}", response.text)
-        
+        if data.get("status") == "healthy":
+            self.log_result("Health Check", True, "API is healthy")
+            return True
+        self.log_result("Health Check", False, "Unexpected response format", error_provider=lambda: str(data))
         return False
     
-    def test_locations_endpoint(self):
+    def test_locations_endpoint(self) -> bool:
         """Test Tamil Nadu locations endpoint"""
         print("\n🔍 Testing Locations Endpoint...")
         
-        response, error = self.make_request("GET", "/locations")
-        if error:
-            self.log_result("Locations Endpoint", False, "Request failed", error)
+        data = self._expect_ok(*self.make_request("GET", "/locations"), "Locations Endpoint")
+        if data is None:
             return False
         
-        if response.status_code == 200:
-            data = response.json()
-            # Check if Tamil Nadu districts are present
-            expected_districts = ["Chennai", "Coimbatore", "Madurai"]
-            if all(district in data for district in expected_districts):
-                self.log_result("Locations Endpoint", True, "Tamil Nadu location data available")
-                return True
-            else:
-                self.log_result("Locations Endpoint", False, "Missing expected districts", str(data.keys()))
-        else:
-            self.log_result("Locations Endpoint", False, f"Status code: {response.status_code}", response.text)
-        
+        # Check if Tamil Nadu districts are present
+        expected_districts = ["Chennai", "Coimbatore", "Madurai"]
+        if all(district in data for district in expected_districts):
+            self.log_result("Locations Endpoint", True, "Tamil Nadu location data available")
+            return True
+        self.log_result("Locations Endpoint", False, "Missing expected districts", error_provider=lambda: str(data.keys()))
         return False
     
-    def test_user_registration(self):
+    def test_user_registration(self) -> bool:
         """Test user registration for all 3 user types"""
         print("\n🔍 Testing User Registration...")
         
-        import random
-        timestamp = str(int(time.time()))
-        
-        user_types = [
-            {
-                "type": "customer",
-                "email": f"priya.customer.{timestamp}@orderbuddy.com",
-                "name": "Priya Sharma",
-                "phone": "+91-9876543210",
-                "district": "Chennai",
-                "taluk": "Chennai North",
-                "village_city": "Washermanpet"
-            },
-            {
-                "type": "shop_owner",
-                "email": f"ravi.shopowner.{timestamp}@orderbuddy.com", 
-                "name": "Ravi Kumar",
-                "phone": "+91-9876543211",
-                "district": "Coimbatore",
-                "taluk": "Coimbatore South",
-                "village_city": "Singanallur"
-            },
-            {
-                "type": "delivery_person",
-                "email": f"kumar.delivery.{timestamp}@orderbuddy.com",
-                "name": "Kumar Raj",
-                "phone": "+91-9876543212",
-                "district": "Madurai",
-                "taluk": "Melur",
-                "village_city": "Melur"
-            }
-        ]
+        run_id = str(int(time.time()))
+        user_types = [{**user_type, "email": user_type["email"].format(run_id=run_id)} for user_type in USER_TYPES]
         
-        success_count = 0
-        for user_data in user_types:
-            user_payload = {
-                "email": user_data["email"],
-                "password": "SecurePass123!",
-                "name": user_data["name"],
-                "phone": user_data["phone"],
-                "user_type": user_data["type"],
-                "district": user_data["district"],
-                "taluk": user_data["taluk"],
-                "village_city": user_data["village_city"]
-            }
-            
-            response, error = self.make_request("POST", "/auth/register", user_payload)
-            if error:
-                self.log_result(f"Register {user_data['type']}", False, "Request failed", error)
-                continue
-            
-            if response.status_code == 200:
-                data = response.json()
-                if "token" in data and "user" in data:
-                    self.test_users[user_data["type"]] = {
-                        "user_data": data["user"],
-                        "token": data["token"],
-                        "email": user_data["email"],
-                        "password": "SecurePass123!"
-                    }
-                    self.log_result(f"Register {user_data['type']}", True, f"User {user_data['name']} registered successfully")
-                    success_count += 1
-                else:
-                    self.log_result(f"Register {user_data['type']}", False, "Missing token or user in response", str(data))
-            else:
-                self.log_result(f"Register {user_data['type']}", False, f"Status code: {response.status_code}", response.text)
-        
-        return success_count == len(user_types)
-    
-    def test_user_login(self):
+        with ThreadPoolExecutor(max_workers=len(user_types)) as executor:
+            results = list(executor.map(self._register_user, user_types))
+        
+        return all(results)
+    
+    def _register_user(self, user_data: Dict) -> bool:
+        """Register a single user and keep its credentials for later tests"""
+        test_name = f"Register {user_data['type']}"
+        user_payload = {
+            "email": user_data["email"],
+            "password": TEST_PASSWORD,
+            "name": user_data["name"],
+            "phone": user_data["phone"],
+            "user_type": user_data["type"],
+            "district": user_data["district"],
+            "taluk": user_data["taluk"],
+            "village_city": user_data["village_city"]
+        }
+        
+        data = self._expect_ok(*self.make_request("POST", "/auth/register", json_body=user_payload), test_name)
+        if data is None:
+            return False
+        
+        if "token" in data and "user" in data:
+            with self._lock:
+                self.test_users[user_data["type"]] = {
+                    "user_data": data["user"],
+                    "token": data["token"],
+                    "auth_header": {"Authorization": f"Bearer {data['token']}"},
+                    "email": user_data["email"],
+                    "password": TEST_PASSWORD
+                }
+            self.log_result(test_name, True, f"User {user_data['name']} registered successfully")
+            return True
+        self.log_result(test_name, False, "Missing token or user in response", error_provider=lambda: str(data))
+        return False
+    
+    def test_user_login(self) -> bool:
         """Test user login for all registered users"""
         print("\n🔍 Testing User Login...")
         
-        success_count = 0
-        for user_type, user_info in self.test_users.items():
-            login_payload = {
-                "email": user_info["email"],
-                "password": user_info["password"]
-            }
-            
-            response, error = self.make_request("POST", "/auth/login", login_payload)
-            if error:
-                self.log_result(f"Login {user_type}", False, "Request failed", error)
-                continue
-            
-            if response.status_code == 200:
-                data = response.json()
-                if "token" in data and "user" in data:
-                    # Update token (in case it's different)
-                    self.test_users[user_type]["token"] = data["token"]
-                    self.log_result(f"Login {user_type}", True, f"Login successful for {user_info['email']}")
-                    success_count += 1
-                else:
-                    self.log_result(f"Login {user_type}", False, "Missing token or user in response", str(data))
-            else:
-                self.log_result(f"Login {user_type}", False, f"Status code: {response.status_code}", response.text)
-        
-        return success_count == len(self.test_users)
-    
-    def test_shop_creation(self):
+        # Workers log in from a snapshot of the users and never write to test_users
+        users = tuple(self.test_users.items())
+        with ThreadPoolExecutor(max_workers=max(len(users), 1)) as executor:
+            tokens = list(executor.map(lambda user: self._login_user(*user), users))
+        
+        # Update tokens (in case they're different) once all logins are done
+        for (user_type, user_info), token in zip(users, tokens):
+            if token is not None:
+                user_info["token"] = token
+                user_info["auth_header"] = {"Authorization": f"Bearer {token}"}
+        
+        return all(token is not None for token in tokens)
+    
+    def _login_user(self, user_type: str, user_info: Dict) -> Optional[str]:
+        """Log in a single registered user, returning its new token"""
+        test_name = f"Login {user_type}"
+        login_payload = {
+            "email": user_info["email"],
+            "password": user_info["password"]
+        }
+        
+        data = self._expect_ok(*self.make_request("POST", "/auth/login", json_body=login_payload), test_name)
+        if data is None:
+            return None
+        
+        if "token" in data and "user" in data:
+            self.log_result(test_name, True, f"Login successful for {user_info['email']}")
+            return data["token"]
+        self.log_result(test_name, False, "Missing token or user in response", error_provider=lambda: str(data))
+        return None
+    
+    def test_shop_creation(self) -> bool:
         """Test shop creation by shop owner"""
         print("\n🔍 Testing Shop Creation...")
         
@@ -229,35 +379,15 @@ class OrderBuddyTester:
             return False
         
         shop_owner = self.test_users["shop_owner"]
-        shop_payload = {
-            "name": "Ravi's General Store",
-            "description": "Fresh groceries and daily essentials in Coimbatore",
-            "district": "Coimbatore",
-            "taluk": "Coimbatore South",
-            "village_city": "Singanallur",
-            "opening_time": "08:00",
-            "closing_time": "22:00"
-        }
-        
-        response, error = self.make_request("POST", "/shops", shop_payload, token=shop_owner["token"])
-        if error:
-            self.log_result("Shop Creation", False, "Request failed", error)
+        shop = self._expect_ok(*self.make_request("POST", "/shops", json_body=SHOP_PAYLOAD_BYTES, auth_header=shop_owner["auth_header"]), "Shop Creation", key="shop")
+        if shop is None:
             return False
         
-        if response.status_code == 200:
-            data = response.json()
-            if "shop" in data:
-                self.test_shops["general_store"] = data["shop"]
-                self.log_result("Shop Creation", True, f"Shop '{shop_payload['name']}' created successfully")
-                return True
-            else:
-                self.log_result("Shop Creation", False, "Missing shop in response", str(data))
-        else:
-            self.log_result("Shop Creation", False, f"Status code: {response.status_code}", response.text)
-        
-        return False
+        self.test_shops["general_store"] = shop
+        self.log_result("Shop Creation", True, f"Shop '{SHOP_PAYLOAD['name']}' created successfully")
+        return True
     
-    def test_product_creation(self):
+    def test_product_creation(self) -> bool:
         """Test product creation in shop"""
         print("\n🔍 Testing Product Creation...")
         
@@ -268,124 +398,86 @@ class OrderBuddyTester:
         shop_owner = self.test_users["shop_owner"]
         shop = self.test_shops["general_store"]
         
-        products = [
-            {
-                "name": "Basmati Rice",
-                "description": "Premium quality basmati rice - 1kg pack",
-                "price": 120.0,
-                "category": "Groceries",
-                "stock_quantity": 50,
-                "image_url": "https://example.com/rice.jpg"
-            },
-            {
-                "name": "Fresh Tomatoes",
-                "description": "Farm fresh tomatoes - per kg",
-                "price": 40.0,
-                "category": "Vegetables",
-                "stock_quantity": 25,
-                "image_url": "https://example.com/tomatoes.jpg"
-            }
-        ]
+        with ThreadPoolExecutor(max_workers=len(PRODUCTS)) as executor:
+            results = list(executor.map(
+                lambda product_data, product_body: self._create_product(shop, shop_owner, product_data, product_body),
+                PRODUCTS,
+                PRODUCTS_BYTES
+            ))
         
-        success_count = 0
-        for product_data in products:
-            response, error = self.make_request("POST", f"/shops/{shop['id']}/products", product_data, token=shop_owner["token"])
-            if error:
-                self.log_result(f"Create Product {product_data['name']}", False, "Request failed", error)
-                continue
-            
-            if response.status_code == 200:
-                data = response.json()
-                if "product" in data:
-                    self.test_products[product_data["name"]] = data["product"]
-                    self.log_result(f"Create Product {product_data['name']}", True, f"Product created successfully")
-                    success_count += 1
-                else:
-                    self.log_result(f"Create Product {product_data['name']}", False, "Missing product in response", str(data))
-            else:
-                self.log_result(f"Create Product {product_data['name']}", False, f"Status code: {response.status_code}", response.text)
-        
-        return success_count == len(products)
-    
-    def test_shop_listing(self):
+        return all(results)
+    
+    def _create_product(self, shop: Dict, shop_owner: Dict, product_data: Dict, product_body: bytes) -> bool:
+        """Create a single product in the shop and keep it for later tests"""
+        test_name = f"Create Product {product_data['name']}"
+        product = self._expect_ok(
+            *self.make_request("POST", f"/shops/{shop['id']}/products", json_body=product_body, auth_header=shop_owner["auth_header"]),
+            test_name,
+            key="product"
+        )
+        if product is None:
+            return False
+        
+        with self._lock:
+            self.test_products[product_data["name"]] = product
+        self.log_result(test_name, True, "Product created successfully")
+        return True
+    
+    def test_shop_listing(self) -> bool:
         """Test shop listing with location filtering"""
         print("\n🔍 Testing Shop Listing...")
         
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            all_shops_request = executor.submit(self.make_request, "GET", "/shops")
+            filtered_shops_request = executor.submit(self.make_request, "GET", "/shops", params={"district": "Coimbatore"})
+        
         # Test general shop listing
-        response, error = self.make_request("GET", "/shops")
-        if error:
-            self.log_result("Shop Listing", False, "Request failed", error)
+        shops = self._expect_ok(*all_shops_request.result(), "Shop Listing")
+        if shops is None:
             return False
-        
-        if response.status_code == 200:
-            shops = response.json()
-            if isinstance(shops, list) and len(shops) > 0:
-                self.log_result("Shop Listing", True, f"Found {len(shops)} shops")
-            else:
-                self.log_result("Shop Listing", False, "No shops found", str(shops))
-                return False
-        else:
-            self.log_result("Shop Listing", False, f"Status code: {response.status_code}", response.text)
+        if not isinstance(shops, list) or len(shops) == 0:
+            self.log_result("Shop Listing", False, "No shops found", error_provider=lambda: str(shops))
             return False
+        self.log_result("Shop Listing", True, f"Found {len(shops)} shops")
         
         # Test location-based filtering
-        response, error = self.make_request("GET", "/shops", {"district": "Coimbatore"})
-        if error:
-            self.log_result("Shop Location Filter", False, "Request failed", error)
+        filtered_shops = self._expect_ok(*filtered_shops_request.result(), "Shop Location Filter")
+        if filtered_shops is None:
             return False
-        
-        if response.status_code == 200:
-            filtered_shops = response.json()
-            if isinstance(filtered_shops, list):
-                self.log_result("Shop Location Filter", True, f"Found {len(filtered_shops)} shops in Coimbatore")
-                return True
-            else:
-                self.log_result("Shop Location Filter", False, "Invalid response format", str(filtered_shops))
-        else:
-            self.log_result("Shop Location Filter", False, f"Status code: {response.status_code}", response.text)
-        
-        return False
+        if not isinstance(filtered_shops, list):
+            self.log_result("Shop Location Filter", False, "Invalid response format", error_provider=lambda: str(filtered_shops))
+            return False
+        self.log_result("Shop Location Filter", True, f"Found {len(filtered_shops)} shops in Coimbatore")
+        return True
     
-    def test_product_search(self):
+    def test_product_search(self) -> bool:
         """Test product search functionality"""
         print("\n🔍 Testing Product Search...")
         
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            query_request = executor.submit(self.make_request, "GET", "/products/search", params={"query": "rice"})
+            location_request = executor.submit(self.make_request, "GET", "/products/search", params={"district": "Coimbatore", "category": "Groceries"})
+        
         # Test general product search
-        response, error = self.make_request("GET", "/products/search", {"query": "rice"})
-        if error:
-            self.log_result("Product Search", False, "Request failed", error)
+        products = self._expect_ok(*query_request.result(), "Product Search")
+        if products is None:
             return False
-        
-        if response.status_code == 200:
-            products = response.json()
-            if isinstance(products, list):
-                self.log_result("Product Search", True, f"Found {len(products)} products for 'rice'")
-            else:
-                self.log_result("Product Search", False, "Invalid response format", str(products))
-                return False
-        else:
-            self.log_result("Product Search", False, f"Status code: {response.status_code}", response.text)
+        if not isinstance(products, list):
+            self.log_result("Product Search", False, "Invalid response format", error_provider=lambda: str(products))
             return False
+        self.log_result("Product Search", True, f"Found {len(products)} products for 'rice'")
         
         # Test location-based product search
-        response, error = self.make_request("GET", "/products/search", {"district": "Coimbatore", "category": "Groceries"})
-        if error:
-            self.log_result("Product Location Search", False, "Request failed", error)
+        products = self._expect_ok(*location_request.result(), "Product Location Search")
+        if products is None:
             return False
-        
-        if response.status_code == 200:
-            products = response.json()
-            if isinstance(products, list):
-                self.log_result("Product Location Search", True, f"Found {len(products)} grocery products in Coimbatore")
-                return True
-            else:
-                self.log_result("Product Location Search", False, "Invalid response format", str(products))
-        else:
-            self.log_result("Product Location Search", False, f"Status code: {response.status_code}", response.text)
-        
-        return False
+        if not isinstance(products, list):
+            self.log_result("Product Location Search", False, "Invalid response format", error_provider=lambda: str(products))
+            return False
+        self.log_result("Product Location Search", True, f"Found {len(products)} grocery products in Coimbatore")
+        return True
     
-    def test_cart_operations(self):
+    def test_cart_operations(self) -> bool:
         """Test shopping cart operations"""
         print("\n🔍 Testing Cart Operations...")
         
@@ -395,44 +487,34 @@ class OrderBuddyTester:
         
         customer = self.test_users["customer"]
         
-        # Add items to cart
-        success_count = 0
-        for product_name, product in self.test_products.items():
-            cart_item = {
-                "product_id": product["id"],
-                "quantity": 2
-            }
-            
-            response, error = self.make_request("POST", "/cart", cart_item, token=customer["token"])
-            if error:
-                self.log_result(f"Add to Cart {product_name}", False, "Request failed", error)
-                continue
-            
-            if response.status_code == 200:
-                self.log_result(f"Add to Cart {product_name}", True, "Item added to cart")
-                success_count += 1
-            else:
-                self.log_result(f"Add to Cart {product_name}", False, f"Status code: {response.status_code}", response.text)
+        # Nothing depends on the order of cart inserts
+        products = list(self.test_products.items())
+        with ThreadPoolExecutor(max_workers=len(products)) as executor:
+            success_count = sum(executor.map(lambda item: self._add_to_cart(customer, *item), products))
         
         # Get cart contents
-        response, error = self.make_request("GET", "/cart", token=customer["token"])
-        if error:
-            self.log_result("Get Cart", False, "Request failed", error)
+        cart_items = self._expect_ok(*self.make_request("GET", "/cart", auth_header=customer["auth_header"]), "Get Cart")
+        if cart_items is None:
             return False
+        if not isinstance(cart_items, list) or len(cart_items) == 0:
+            self.log_result("Get Cart", False, "Cart is empty or invalid format", error_provider=lambda: str(cart_items))
+            return False
+        self.log_result("Get Cart", True, f"Cart contains {len(cart_items)} items")
+        return success_count > 0
+    
+    def _add_to_cart(self, customer: Dict, product_name: str, product: Dict) -> bool:
+        """Add two of a single product to the customer's cart"""
+        cart_item = {
+            "product_id": product["id"],
+            "quantity": 2
+        }
         
-        if response.status_code == 200:
-            cart_items = response.json()
-            if isinstance(cart_items, list) and len(cart_items) > 0:
-                self.log_result("Get Cart", True, f"Cart contains {len(cart_items)} items")
-                return success_count > 0
-            else:
-                self.log_result("Get Cart", False, "Cart is empty or invalid format", str(cart_items))
-        else:
-            self.log_result("Get Cart", False, f"Status code: {response.status_code}", response.text)
-        
-        return False
+        if self._expect_ok(*self.make_request("POST", "/cart", json_body=cart_item, auth_header=customer["auth_header"]), f"Add to Cart {product_name}") is None:
+            return False
+        self.log_result(f"Add to Cart {product_name}", True, "Item added to cart")
+        return True
     
-    def test_order_placement(self):
+    def test_order_placement(self) -> bool:
         """Test order placement"""
         print("\n🔍 Testing Order Placement...")
         
@@ -444,18 +526,11 @@ class OrderBuddyTester:
         shop = self.test_shops["general_store"]
         
         # Prepare order items
-        order_items = []
-        total_amount = 0
-        for product_name, product in self.test_products.items():
-            quantity = 1
-            item = {
-                "product_id": product["id"],
-                "quantity": quantity,
-                "price": product["price"],
-                "name": product["name"]
-            }
-            order_items.append(item)
-            total_amount += product["price"] * quantity
+        order_items = [
+            {"product_id": product["id"], "quantity": 1, "price": product["price"], "name": product["name"]}
+            for product in self.test_products.values()
+        ]
+        total_amount = sum(item["price"] * item["quantity"] for item in order_items)
         
         order_payload = {
             "shop_id": shop["id"],
@@ -464,79 +539,53 @@ class OrderBuddyTester:
             "delivery_address": "123 Main Street, Washermanpet, Chennai North, Chennai"
         }
         
-        response, error = self.make_request("POST", "/orders", order_payload, token=customer["token"])
-        if error:
-            self.log_result("Order Placement", False, "Request failed", error)
+        order = self._expect_ok(*self.make_request("POST", "/orders", json_body=order_payload, auth_header=customer["auth_header"]), "Order Placement", key="order")
+        if order is None:
             return False
         
-        if response.status_code == 200:
-            data = response.json()
-            if "order" in data:
-                self.test_orders["customer_order"] = data["order"]
-                self.log_result("Order Placement", True, f"Order placed successfully with total ₹{total_amount}")
-                return True
-            else:
-                self.log_result("Order Placement", False, "Missing order in response", str(data))
-        else:
-            self.log_result("Order Placement", False, f"Status code: {response.status_code}", response.text)
-        
-        return False
+        self.test_orders["customer_order"] = order
+        self.log_result("Order Placement", True, f"Order placed successfully with total ₹{total_amount}")
+        return True
+    
+    def _check_order_list(self, user_type: str, label: str) -> bool:
+        """Check the order listing returned for a single user"""
+        test_name = f"{label} Order List"
+        orders = self._expect_ok(*self.make_request("GET", "/orders", auth_header=self.test_users[user_type]["auth_header"]), test_name)
+        if orders is None:
+            return False
+        if not isinstance(orders, list):
+            self.log_result(test_name, False, "Invalid response format", error_provider=lambda: str(orders))
+            return False
+        self.log_result(test_name, True, f"{label} has {len(orders)} orders")
+        return True
     
-    def test_order_management(self):
+    def test_order_management(self) -> bool:
         """Test order listing and status updates"""
         print("\n🔍 Testing Order Management...")
         
         success_count = 0
         
         # Test customer order listing
-        if "customer" in self.test_users:
-            customer = self.test_users["customer"]
-            response, error = self.make_request("GET", "/orders", token=customer["token"])
-            if error:
-                self.log_result("Customer Order List", False, "Request failed", error)
-            elif response.status_code == 200:
-                orders = response.json()
-                if isinstance(orders, list):
-                    self.log_result("Customer Order List", True, f"Customer has {len(orders)} orders")
-                    success_count += 1
-                else:
-                    self.log_result("Customer Order List", False, "Invalid response format", str(orders))
-            else:
-                self.log_result("Customer Order List", False, f"Status code: {response.status_code}", response.text)
+        if "customer" in self.test_users and self._check_order_list("customer", "Customer"):
+            success_count += 1
         
         # Test shop owner order listing
-        if "shop_owner" in self.test_users:
-            shop_owner = self.test_users["shop_owner"]
-            response, error = self.make_request("GET", "/orders", token=shop_owner["token"])
-            if error:
-                self.log_result("Shop Owner Order List", False, "Request failed", error)
-            elif response.status_code == 200:
-                orders = response.json()
-                if isinstance(orders, list):
-                    self.log_result("Shop Owner Order List", True, f"Shop owner has {len(orders)} orders")
-                    success_count += 1
-                else:
-                    self.log_result("Shop Owner Order List", False, "Invalid response format", str(orders))
-            else:
-                self.log_result("Shop Owner Order List", False, f"Status code: {response.status_code}", response.text)
+        if "shop_owner" in self.test_users and self._check_order_list("shop_owner", "Shop Owner"):
+            success_count += 1
         
         # Test order status update
         if "shop_owner" in self.test_users and "customer_order" in self.test_orders:
             shop_owner = self.test_users["shop_owner"]
             order = self.test_orders["customer_order"]
             
-            response, error = self.make_request("PATCH", f"/orders/{order['id']}/status", {"status": "packed"}, token=shop_owner["token"])
-            if error:
-                self.log_result("Order Status Update", False, "Request failed", error)
-            elif response.status_code == 200:
+            status_update = self.make_request("PATCH", f"/orders/{order['id']}/status", json_body={"status": "packed"}, auth_header=shop_owner["auth_header"])
+            if self._expect_ok(*status_update, "Order Status Update") is not None:
                 self.log_result("Order Status Update", True, "Order status updated to 'packed'")
                 success_count += 1
-            else:
-                self.log_result("Order Status Update", False, f"Status code: {response.status_code}", response.text)
         
         return success_count >= 2
     
-    def test_ai_assistant(self):
+    def test_ai_assistant(self) -> bool:
         """Test AI shopping assistant"""
         print("\n🔍 Testing AI Assistant...")
         
@@ -551,109 +600,118 @@ class OrderBuddyTester:
             "context": "product_search"
         }
         
-        response, error = self.make_request("POST", "/ai/assistant", ai_request, token=customer["token"])
-        if error:
-            self.log_result("AI Assistant", False, "Request failed", error)
+        ai_response = self._expect_ok(*self.make_request("POST", "/ai/assistant", json_body=ai_request, auth_header=customer["auth_header"]), "AI Assistant", key="response")
+        if ai_response is None:
             return False
-        
-        if response.status_code == 200:
-            data = response.json()
-            if "response" in data and data["response"]:
-                self.log_result("AI Assistant", True, "AI assistant provided response")
-                return True
-            else:
-                self.log_result("AI Assistant", False, "Empty or missing AI response", str(data))
-        else:
-            self.log_result("AI Assistant", False, f"Status code: {response.status_code}", response.text)
-        
-        return False
+        if not ai_response:
+            self.log_result("AI Assistant", False, "Empty AI response", error_provider=lambda: str(ai_response))
+            return False
+        self.log_result("AI Assistant", True, "AI assistant provided response")
+        return True
     
-    def test_dashboard_stats(self):
+    def test_dashboard_stats(self) -> bool:
         """Test dashboard statistics for all user types"""
         print("\n🔍 Testing Dashboard Statistics...")
         
-        success_count = 0
+        # Workers read from a snapshot of the users
+        users = tuple(self.test_users.items())
+        with ThreadPoolExecutor(max_workers=max(len(users), 1)) as executor:
+            results = list(executor.map(lambda user: self._check_dashboard_stats(*user), users))
         
-        for user_type, user_info in self.test_users.items():
-            response, error = self.make_request("GET", "/dashboard/stats", token=user_info["token"])
-            if error:
-                self.log_result(f"Dashboard Stats {user_type}", False, "Request failed", error)
-                continue
-            
-            if response.status_code == 200:
-                stats = response.json()
-                if isinstance(stats, dict) and "user_type" in stats:
-                    expected_fields = {
-                        "customer": ["total_orders", "cart_items"],
-                        "shop_owner": ["total_shops", "total_products", "total_orders"],
-                        "delivery_person": ["total_deliveries", "pending_deliveries"]
-                    }
-                    
-                    if user_type in expected_fields:
-                        required_fields = expected_fields[user_type]
-                        if all(field in stats for field in required_fields):
-                            self.log_result(f"Dashboard Stats {user_type}", True, f"Stats retrieved: {stats}")
-                            success_count += 1
-                        else:
-                            missing_fields = [f for f in required_fields if f not in stats]
-                            self.log_result(f"Dashboard Stats {user_type}", False, f"Missing fields: {missing_fields}", str(stats))
-                    else:
-                        self.log_result(f"Dashboard Stats {user_type}", False, "Unknown user type", str(stats))
-                else:
-                    self.log_result(f"Dashboard Stats {user_type}", False, "Invalid response format", str(stats))
-            else:
-                self.log_result(f"Dashboard Stats {user_type}", False, f"Status code: {response.status_code}", response.text)
-        
-        return success_count == len(self.test_users)
-    
-    def run_all_tests(self):
+        return all(results)
+    
+    def _check_dashboard_stats(self, user_type: str, user_info: Dict) -> bool:
+        """Check the dashboard statistics returned for a single user"""
+        test_name = f"Dashboard Stats {user_type}"
+        stats = self._expect_ok(*self.make_request("GET", "/dashboard/stats", auth_header=user_info["auth_header"]), test_name)
+        if stats is None:
+            return False
+        
+        if not isinstance(stats, dict) or "user_type" not in stats:
+            self.log_result(test_name, False, "Invalid response format", error_provider=lambda: str(stats))
+            return False
+        
+        if user_type not in EXPECTED_STATS_FIELDS:
+            self.log_result(test_name, False, "Unknown user type", error_provider=lambda: str(stats))
+            return False
+        
+        missing_fields = [f for f in EXPECTED_STATS_FIELDS[user_type] if f not in stats]
+        if missing_fields:
+            self.log_result(test_name, False, f"Missing fields: {missing_fields}", error_provider=lambda: str(stats))
+            return False
+        self.log_result(test_name, True, f"Stats retrieved: {stats}")
+        return True
+    
+    def test_order_flow(self) -> bool:
+        """Test cart, order placement and order management, which build on each other"""
+        return all([
+            self.test_cart_operations(),
+            self.test_order_placement(),
+            self.test_order_management()
+        ])
+    
+    def run_test(self, test_func: Callable[[], bool]) -> bool:
+        """Run a single test, logging any exception as a failure"""
+        try:
+            return test_func()
+        except Exception as e:
+            self.log_result(test_func.__name__, False, "Test execution failed", str(e))
+            return False
+    
+    def run_stage(self, test_functions: List[Callable[[], bool]]) -> List[bool]:
+        """Run independent tests concurrently and wait for all of them"""
+        with ThreadPoolExecutor(max_workers=min(len(test_functions), MAX_WORKERS)) as executor:
+            return list(executor.map(self.run_test, test_functions))
+    
+    def run_all_tests(self) -> Dict[str, Any]:
         """Run all backend tests"""
         print("🚀 Starting OrderBuddy Backend API Tests")
         print(f"🌐 Testing against: {self.base_url}")
         print("=" * 60)
         
-        # Test sequence
-        test_functions = [
-            self.test_health_check,
-            self.test_locations_endpoint,
-            self.test_user_registration,
-            self.test_user_login,
-            self.test_shop_creation,
-            self.test_product_creation,
-            self.test_shop_listing,
-            self.test_product_search,
-            self.test_cart_operations,
-            self.test_order_placement,
-            self.test_order_management,
-            self.test_ai_assistant,
-            self.test_dashboard_stats
+        # Test stages run in order; the tests within a stage are independent and run concurrently
+        test_stages = [
+            [self.test_health_check, self.test_locations_endpoint],
+            [self.test_user_registration],
+            [self.test_user_login],
+            [self.test_shop_creation],
+            [self.test_product_creation],
+            [
+                self.test_shop_listing,
+                self.test_product_search,
+                self.test_order_flow,
+                self.test_ai_assistant,
+                self.test_dashboard_stats
+            ]
         ]
         
-        for test_func in test_functions:
-            try:
-                test_func()
-            except Exception as e:
-                self.log_result(test_func.__name__, False, "Test execution failed", str(e))
-            
-            # Small delay between tests
-            time.sleep(0.5)
+        try:
+            for test_stage in test_stages:
+                self.run_stage(test_stage)
+        finally:
+            self.close()
         
         # Print final results
         print("\n" + "=" * 60)
         print("📊 TEST RESULTS SUMMARY")
         print("=" * 60)
-        print(f"Total Tests: {self.results['total_tests']}")
-        print(f"✅ Passed: {self.results['passed_tests']}")
-        print(f"❌ Failed: {self.results['failed_tests']}")
-        print(f"Success Rate: {(self.results['passed_tests']/self.results['total_tests']*100):.1f}%")
+        results = self.results
+        print(f"Total Tests: {results['total_tests']}")
+        print(f"✅ Passed: {results['passed_tests']}")
+        print(f"❌ Failed: {results['failed_tests']}")
+        print(f"Success Rate: {(results['passed_tests']/results['total_tests']*100):.1f}%")
         
-        if self.results['errors']:
+        if results['errors']:
             print("\n🔍 FAILED TESTS DETAILS:")
-            for error in self.results['errors']:
+            for error in results['errors']:
                 print(f"  • {error}")
         
-        return self.results
+        return results
 
 if __name__ == "__main__":
-    tester = OrderBuddyTester()
-    results = tester.run_all_tests()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="OrderBuddy Backend API Testing Suite")
+    parser.add_argument("--verbose", action="store_true", help="Print every passing check, not just the failures")
+    args = parser.parse_args()
+    
+    with OrderBuddyTester(verbose=args.verbose) as tester:
+        results = tester.run_all_tests()
\ No newline at end of file
@@ -0,0 +1,251 @@
+"""
+OrderBuddy Backend API tests for pytest
+Covers the same flows as backend_test.py, with the per-user and per-product loops
+split into parametrized cases so they report separately and can run in parallel.
+
+These tests create real users, shops, products and orders, so they only run when
+ORDERBUDDY_API_URL points at a deployment to test against:
+
+    ORDERBUDDY_API_URL=http://localhost:8001/api pytest tests/test_backend.py -n 8 --dist=load
+
+Under --dist=load the tests are spread across workers one by one, and each worker
+runs the session fixtures once for itself, so every worker registers its own users
+and creates its own shop, products and order.
+"""
+
+import os
+import uuid
+
+import pytest
+
+from backend_test import (
+    EXPECTED_STATS_FIELDS,
+    PRODUCTS,
+    SHOP_PAYLOAD,
+    TEST_PASSWORD,
+    USER_TYPES,
+    OrderBuddyTester
+)
+
+API_URL = os.environ.get("ORDERBUDDY_API_URL")
+
+pytestmark = pytest.mark.skipif(not API_URL, reason="set ORDERBUDDY_API_URL to run the backend API tests")
+
+
+def expect_ok(api_client, method, endpoint, **kwargs):
+    """Send a request and return the decoded body, failing the test on any error"""
+    response, error = api_client.make_request(method, endpoint, **kwargs)
+    assert error is None, f"Request failed: {error}"
+    assert response.status_code == 200, f"Status code: {response.status_code} | {response.text}"
+    return api_client._parse(response)
+
+
+@pytest.fixture(scope="session")
+def api_client():
+    with OrderBuddyTester(base_url=API_URL) as tester:
+        response, error = tester.make_request("GET", "/health")
+        if error or response.status_code != 200:
+            pytest.skip(f"OrderBuddy API not reachable at {API_URL}")
+        yield tester
+
+
+@pytest.fixture(scope="session")
+def registered_users(api_client):
+    """Register one user of each type, keyed by user type"""
+    run_id = uuid.uuid4().hex[:12]
+    users = {}
+    for user_spec in USER_TYPES:
+        email = user_spec["email"].format(run_id=run_id)
+        payload = registration_payload(user_spec, email)
+        response, error = api_client.make_request("POST", "/auth/register", json_body=payload)
+        users[user_spec["type"]] = {"email": email, "response": response, "error": error}
+        if not error and response.status_code == 200:
+            data = api_client._parse(response)
+            users[user_spec["type"]].update(
+                user_data=data["user"],
+                auth_header={"Authorization": f"Bearer {data['token']}"}
+            )
+    return users
+
+
+def registration_payload(user_spec, email, **overrides):
+    return {
+        "email": email,
+        "password": TEST_PASSWORD,
+        "name": user_spec["name"],
+        "phone": user_spec["phone"],
+        "user_type": user_spec["type"],
+        "district": user_spec["district"],
+        "taluk": user_spec["taluk"],
+        "village_city": user_spec["village_city"],
+        **overrides
+    }
+
+
+def user_auth(registered_users, user_type):
+    user = registered_users[user_type]
+    if "auth_header" not in user:
+        pytest.skip(f"{user_type} registration failed")
+    return user["auth_header"]
+
+
+@pytest.fixture(scope="session")
+def other_shop_owner(api_client):
+    """Auth header for a second shop owner who owns none of the test shops"""
+    shop_owner_spec = next(u for u in USER_TYPES if u["type"] == "shop_owner")
+    email = shop_owner_spec["email"].format(run_id=f"other.{uuid.uuid4().hex[:12]}")
+    data = expect_ok(api_client, "POST", "/auth/register", json_body=registration_payload(shop_owner_spec, email))
+    return {"Authorization": f"Bearer {data['token']}"}
+
+
+@pytest.fixture(scope="session")
+def shop(api_client, registered_users):
+    auth_header = user_auth(registered_users, "shop_owner")
+    return expect_ok(api_client, "POST", "/shops", json_body=SHOP_PAYLOAD, auth_header=auth_header)["shop"]
+
+
+@pytest.fixture(scope="session")
+def created_products(api_client, registered_users, shop):
+    """Create every product in PRODUCTS, keyed by product name"""
+    auth_header = user_auth(registered_users, "shop_owner")
+    return {
+        product["name"]: expect_ok(api_client, "POST", f"/shops/{shop['id']}/products", json_body=product, auth_header=auth_header)["product"]
+        for product in PRODUCTS
+    }
+
+
+@pytest.fixture(scope="session")
+def placed_order(api_client, registered_users, shop, created_products):
+    auth_header = user_auth(registered_users, "customer")
+    items = [
+        {"product_id": product["id"], "quantity": 1, "price": product["price"], "name": product["name"]}
+        for product in created_products.values()
+    ]
+    payload = {
+        "shop_id": shop["id"],
+        "items": items,
+        "total_amount": sum(item["price"] for item in items),
+        "delivery_address": "123 Main Street, Washermanpet, Chennai North, Chennai"
+    }
+    return expect_ok(api_client, "POST", "/orders", json_body=payload, auth_header=auth_header)["order"]
+
+
+def test_health_check(api_client):
+    assert expect_ok(api_client, "GET", "/health").get("status") == "healthy"
+
+
+def test_locations(api_client):
+    data = expect_ok(api_client, "GET", "/locations")
+    assert all(district in data for district in ["Chennai", "Coimbatore", "Madurai"])
+
+
+@pytest.mark.parametrize("user_spec", USER_TYPES, ids=[u["type"] for u in USER_TYPES])
+def test_register(user_spec, registered_users):
+    user = registered_users[user_spec["type"]]
+    assert user["error"] is None, f"Request failed: {user['error']}"
+    assert user["response"].status_code == 200, user["response"].text
+    assert "auth_header" in user
+
+
+@pytest.mark.parametrize(
+    "district, taluk",
+    [("Chennai", "Melur"), ("Coimbatore", "Chennai North"), ("Madurai", "Pollachi")],
+    ids=["chennai", "coimbatore", "madurai"]
+)
+def test_register_rejects_taluk_from_other_district(district, taluk, api_client):
+    customer_spec = next(u for u in USER_TYPES if u["type"] == "customer")
+    email = customer_spec["email"].format(run_id=f"badtaluk.{uuid.uuid4().hex[:12]}")
+    payload = registration_payload(customer_spec, email, district=district, taluk=taluk)
+    response, error = api_client.make_request("POST", "/auth/register", json_body=payload)
+    assert error is None, f"Request failed: {error}"
+    assert response.status_code == 400, response.text
+    assert api_client._parse(response)["detail"] == "Invalid taluk"
+
+
+@pytest.mark.parametrize("user_spec", USER_TYPES, ids=[u["type"] for u in USER_TYPES])
+def test_login(user_spec, api_client, registered_users):
+    user_auth(registered_users, user_spec["type"])
+    payload = {"email": registered_users[user_spec["type"]]["email"], "password": TEST_PASSWORD}
+    data = expect_ok(api_client, "POST", "/auth/login", json_body=payload)
+    assert "token" in data and "user" in data
+
+
+def test_create_shop(shop):
+    assert shop["name"] == SHOP_PAYLOAD["name"]
+
+
+@pytest.mark.parametrize("product", PRODUCTS, ids=[p["name"] for p in PRODUCTS])
+def test_create_product(product, created_products):
+    assert created_products[product["name"]]["price"] == product["price"]
+
+
+@pytest.mark.parametrize("params", [None, {"district": "Coimbatore"}], ids=["all", "district"])
+def test_shop_listing(params, api_client, shop):
+    shops = expect_ok(api_client, "GET", "/shops", params=params)
+    assert isinstance(shops, list) and len(shops) > 0
+
+
+@pytest.mark.parametrize(
+    "params",
+    [{"query": "rice"}, {"district": "Coimbatore", "category": "Groceries"}],
+    ids=["query", "district_category"]
+)
+def test_product_search(params, api_client, created_products):
+    assert isinstance(expect_ok(api_client, "GET", "/products/search", params=params), list)
+
+
+def test_cart(api_client, registered_users, created_products):
+    auth_header = user_auth(registered_users, "customer")
+    for product in created_products.values():
+        expect_ok(api_client, "POST", "/cart", json_body={"product_id": product["id"], "quantity": 2}, auth_header=auth_header)
+    cart_items = expect_ok(api_client, "GET", "/cart", auth_header=auth_header)
+    assert isinstance(cart_items, list) and len(cart_items) > 0
+
+
+def test_place_order(placed_order, created_products):
+    assert placed_order["total_amount"] == sum(p["price"] for p in created_products.values())
+
+
+@pytest.mark.parametrize("user_type", ["customer", "shop_owner"])
+def test_order_listing(user_type, api_client, registered_users, placed_order):
+    orders = expect_ok(api_client, "GET", "/orders", auth_header=user_auth(registered_users, user_type))
+    assert any(order["id"] == placed_order["id"] for order in orders)
+
+
+def test_order_status_update(api_client, registered_users, placed_order):
+    auth_header = user_auth(registered_users, "shop_owner")
+    expect_ok(api_client, "PATCH", f"/orders/{placed_order['id']}/status", json_body={"status": "packed"}, auth_header=auth_header)
+
+
+def test_order_status_update_other_owner(api_client, other_shop_owner, placed_order):
+    response, error = api_client.make_request(
+        "PATCH", f"/orders/{placed_order['id']}/status", json_body={"status": "packed"}, auth_header=other_shop_owner
+    )
+    assert error is None, f"Request failed: {error}"
+    assert response.status_code == 403, response.text
+
+
+def test_order_status_update_missing_order(api_client, registered_users):
+    auth_header = user_auth(registered_users, "shop_owner")
+    response, error = api_client.make_request(
+        "PATCH", f"/orders/{uuid.uuid4().hex}/status", json_body={"status": "packed"}, auth_header=auth_header
+    )
+    assert error is None, f"Request failed: {error}"
+    assert response.status_code == 404, response.text
+
+
+def test_ai_assistant(api_client, registered_users):
+    payload = {
+        "message": "I need recommendations for fresh vegetables in my area",
+        "user_id": registered_users["customer"].get("user_data", {}).get("id", ""),
+        "context": "product_search"
+    }
+    data = expect_ok(api_client, "POST", "/ai/assistant", json_body=payload, auth_header=user_auth(registered_users, "customer"))
+    assert data.get("response")
+
+
+@pytest.mark.parametrize("user_type", list(EXPECTED_STATS_FIELDS))
+def test_dashboard_stats(user_type, api_client, registered_users):
+    stats = expect_ok(api_client, "GET", "/dashboard/stats", auth_header=user_auth(registered_users, user_type))
+    missing_fields = [f for f in EXPECTED_STATS_FIELDS[user_type] if f not in stats]
+    assert not missing_fields, f"Missing fields: {missing_fields}"